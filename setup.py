@@ -11,8 +11,8 @@ setup(name='youtube-unofficial',
       'YouTube API access.',
       long_description='Access parts of your account unavailable through '
       'normal YouTube API access. Use at your own risk.',
-      install_requires=('beautifulsoup4>=4.3.2', 'html5lib>=0.999',
-                        'requests>=2.6.0'),
+      install_requires=('requests>=2.25.0', 'urllib3>=1.26.0'),
+      extras_require={'speedups': ('brotli>=1.0.0', 'orjson>=3.0.0')},
       python_requires='~=3.6',
       entry_points={
           'console_scripts':
@@ -1,35 +1,88 @@
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from http.cookiejar import CookieJar, LoadError, MozillaCookieJar
+from itertools import chain
 from os.path import expanduser
-from time import sleep
-from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Type, cast
+from time import time as _now
+from typing import (TYPE_CHECKING, AbstractSet, Any, Dict, Iterable, Iterator,
+                    List, Mapping, Optional, Sequence, Set, Tuple, Type,
+                    cast)
 import hashlib
-import json
 import logging
 
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 from typing_extensions import Final
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
 import requests
 
-from .community import CommunityHistoryEntry, make_community_history_entry
-from .constants import (BROWSE_AJAX_URL, COMMUNITY_HISTORY_URL, HISTORY_URL,
-                        SEARCH_HISTORY_URL, SERVICE_AJAX_URL, USER_AGENT,
-                        WATCH_HISTORY_URL, WATCH_LATER_URL)
-from .download import DownloadMixin
+from .constants import (BROWSE_AJAX_URL, CLEAR_PLAYLIST_MAX_PASSES,
+                        COMMUNITY_HISTORY_URL, HISTORY_URL, MAX_WORKERS,
+                        PLAYLIST_EDIT_BATCH_SIZE, SEARCH_HISTORY_URL,
+                        SERVICE_AJAX_URL, USER_AGENT, WATCH_HISTORY_URL,
+                        WATCH_LATER_URL)
+from .download import DownloadMixin, ETagCache, paginate
 from .exceptions import AuthenticationError, UnexpectedError
 from .initial import initial_data
-from .login import YouTubeLogin
 from .typing import HasStringCode
 from .typing.browse_ajax import BrowseAJAXSequence
 from .typing.playlist import PlaylistInfo, PlaylistVideoListRenderer
 from .typing.ytcfg import YtcfgDict
-from .util import context_client_body, path as at_path, path_default
+from .util import (compile_path, context_client_body, json_dumps,
+                   path as at_path, path_default)
 from .ytcfg import find_ytcfg, ytcfg_headers
 
+if TYPE_CHECKING:
+    from .community import CommunityHistoryEntry
+
 __all__ = ('YouTube', )
 
+_FEED_ACTIONS_PATH = compile_path(
+    'contents.twoColumnBrowseResultsRenderer.secondaryContents.'
+    'browseFeedActionsRenderer.contents')
+_CONFIRM_ENDPOINT_PATH = compile_path(
+    'buttonRenderer.navigationEndpoint.confirmDialogEndpoint.content.'
+    'confirmDialogRenderer.confirmEndpoint')
+_CLEAR_SEARCH_HISTORY_TOKEN_PATH = (_FEED_ACTIONS_PATH + (1, ) +
+                                    _CONFIRM_ENDPOINT_PATH +
+                                    ('feedbackEndpoint', 'feedbackToken'))
+_CLEAR_HISTORY_SEJ_PATH = _FEED_ACTIONS_PATH + compile_path(
+    '2.buttonRenderer.navigationEndpoint.confirmDialogEndpoint.content.'
+    'confirmDialogRenderer.confirmButton.buttonRenderer.serviceEndpoint')
+_FIRST_TAB_SECTION_LIST_PATH = compile_path(
+    'contents.twoColumnBrowseResultsRenderer.tabs.0.tabRenderer.content.'
+    'sectionListRenderer')
+_PLAYLIST_VIDEO_LIST_PATH = _FIRST_TAB_SECTION_LIST_PATH + compile_path(
+    'contents.0.itemSectionRenderer.contents.0.playlistVideoListRenderer')
+_CONTINUATION_ITEMS_PATH = compile_path(
+    'onResponseReceivedActions.0.appendContinuationItemsAction.'
+    'continuationItems')
+_HISTORY_ENTRY_SEJ_PATH = compile_path(
+    'videoRenderer.menu.menuRenderer.topLevelButtons.0.buttonRenderer.'
+    'serviceEndpoint')
+_COMMUNITY_ITEM_SECTION_PATH = compile_path(
+    'contents.twoColumnBrowseResultsRenderer.tabs.0.tabRenderer.content.'
+    'sectionListRenderer.contents.0.itemSectionRenderer')
+_COMMUNITY_DELETE_ACTION_PATH = compile_path(
+    'actionMenu.menuRenderer.items.0.menuNavigationItemRenderer.'
+    'navigationEndpoint.confirmDialogEndpoint.content.confirmDialogRenderer.'
+    'confirmButton.buttonRenderer.serviceEndpoint.'
+    'performCommentActionEndpoint.action')
+
+
+def _remove_video_actions(video_ids: Iterable[str]) -> List[Dict[str, str]]:
+    return [
+        dict(removedVideoId=video_id, action='ACTION_REMOVE_VIDEO_BY_VIDEO_ID')
+        for video_id in video_ids
+    ]
+
 
 class YouTube(DownloadMixin):
+    __slots__ = ('_cj', '_etag_cache', '_last_history_headers',
+                 '_last_history_ytcfg', '_log', '_login_handler',
+                 '_rsvi_cache', '_sapisid', '_sapisidhash', '_sess',
+                 'netrc_file', 'password', 'username')
+
     def __init__(self,
                  username: Optional[str] = None,
                  password: Optional[str] = None,
@@ -48,14 +101,38 @@ class YouTube(DownloadMixin):
         self._log: Final[logging.Logger] = logging.getLogger(
             'youtube-unofficial')
         self._sess = requests.Session()
+        self._etag_cache: ETagCache = {}
+        adapter = HTTPAdapter(pool_connections=4,
+                              pool_maxsize=32,
+                              max_retries=Retry(
+                                  total=3,
+                                  backoff_factor=0.5,
+                                  status_forcelist=(429, 500, 502, 503, 504),
+                                  allowed_methods=frozenset(('GET', 'POST')),
+                                  raise_on_status=False))
+        self._sess.mount('https://', adapter)
         self._init_cookiejar(cookies_path, cls=cookiejar_cls)
         self._sess.cookies = self._cj  # type: ignore[assignment]
-        self._sess.headers.update({'User-Agent': USER_AGENT})
+        # Deferred so that importing this package does not load the login code
+        # pylint: disable=import-outside-toplevel
+        from .login import YouTubeLogin
+        # urllib3 only offers the encodings it can decode (Brotli and zstd
+        # when their modules are installed)
+        self._sess.headers.update({
+            'Accept-Encoding':
+            make_headers(accept_encoding=True)['accept-encoding'],
+            'User-Agent': USER_AGENT
+        })
         self._login_handler = YouTubeLogin(self._sess,
                                            self._cj,
                                            username,
                                            logged_in=logged_in)
-        self._rsvi_cache: Optional[Dict[str, Any]] = None
+        self._rsvi_cache: Optional[YtcfgDict] = None
+        self._sapisid: Optional[str] = None
+        self._last_history_ytcfg: Optional[YtcfgDict] = None
+        self._last_history_headers: Optional[Dict[str, str]] = None
+        # (timestamp, header) of the last SAPISIDHASH computed
+        self._sapisidhash: Tuple[int, str] = (0, '')
 
     @property
     def logged_in(self):
@@ -84,39 +161,33 @@ class YouTube(DownloadMixin):
 
     def login(self) -> None:
         self._login_handler.login()
+        self._sapisid = self._find_sapisid()
 
-    def remove_video_id_from_playlist(
-            self,
-            playlist_id: str,
-            video_id: str,
-            cache_values: Optional[bool] = False) -> None:
-        """Removes a video from a playlist."""
-        if not self.logged_in:
-            raise AuthenticationError('This method requires a call to login()'
-                                      ' first')
+    def _find_sapisid(self) -> Optional[str]:
+        for cookie in self._cj:
+            if cookie.name in ('SAPISID', '__Secure-3PAPISID'):
+                return cookie.value
+        return None
 
+    def _playlist_edit_ytcfg(
+            self,
+            cache_values: Optional[bool] = False) -> YtcfgDict:
         if cache_values and self._rsvi_cache:
-            soup = self._rsvi_cache['soup']
-            ytcfg = self._rsvi_cache['ytcfg']
-            headers = self._rsvi_cache['headers']
-        else:
-            soup = self._download_page_soup(WATCH_LATER_URL)
-            ytcfg = find_ytcfg(soup)
-            headers = ytcfg_headers(ytcfg)
+            return self._rsvi_cache
+        ytcfg = find_ytcfg(self._download_page_text(WATCH_LATER_URL))
         if cache_values:
-            self._rsvi_cache = dict(soup=soup, ytcfg=ytcfg, headers=headers)
-
-        action = {
-            'removedVideoId': video_id,
-            'action': 'ACTION_REMOVE_VIDEO_BY_VIDEO_ID'
-        }
+            self._rsvi_cache = ytcfg
+        return ytcfg
 
+    def _edit_playlist(self, playlist_id: str,
+                       actions: Sequence[Mapping[str, str]],
+                       ytcfg: YtcfgDict) -> bool:
         return (at_path(
             'status',
             cast(
                 Mapping[str, Any],
                 self._download_page(
-                    f'https://www.youtube.com/youtubei/v1/browse/edit_playlist',
+                    'https://www.youtube.com/youtubei/v1/browse/edit_playlist',
                     method='post',
                     params=dict(key=ytcfg['INNERTUBE_API_KEY']),
                     headers={
@@ -125,7 +196,7 @@ class YouTube(DownloadMixin):
                         'x-goog-authuser': '0',
                         'x-origin': 'https://www.youtube.com',
                     },
-                    json=dict(actions=[action],
+                    json=dict(actions=actions,
                               playlistId=playlist_id,
                               params='CAFAAQ%3D%3D',
                               context=dict(
@@ -135,12 +206,48 @@ class YouTube(DownloadMixin):
                               )),
                     return_json=True))) == 'STATUS_SUCCEEDED')
 
+    def remove_video_ids_from_playlist(
+            self,
+            playlist_id: str,
+            video_ids: Sequence[str],
+            cache_values: Optional[bool] = False) -> bool:
+        """
+        Removes videos from a playlist. One request is made per
+        `PLAYLIST_EDIT_BATCH_SIZE` videos.
+        """
+        if not self.logged_in:
+            raise AuthenticationError('This method requires a call to login()'
+                                      ' first')
+        if not video_ids:
+            return True
+        ytcfg = self._playlist_edit_ytcfg(cache_values)
+
+        def edit(i: int) -> bool:
+            batch = video_ids[i:i + PLAYLIST_EDIT_BATCH_SIZE]
+            return self._edit_playlist(playlist_id,
+                                       _remove_video_actions(batch), ytcfg)
+
+        batches = range(0, len(video_ids), PLAYLIST_EDIT_BATCH_SIZE)
+        if len(batches) == 1:
+            return edit(0)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return all(list(executor.map(edit, batches)))
+
+    def remove_video_id_from_playlist(
+            self,
+            playlist_id: str,
+            video_id: str,
+            cache_values: Optional[bool] = False) -> bool:
+        """Removes a video from a playlist."""
+        return self.remove_video_ids_from_playlist(playlist_id, [video_id],
+                                                   cache_values)
+
     def clear_watch_history(self) -> None:
         """Clears watch history."""
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        content = self._download_page_soup(HISTORY_URL)
+        content = self._download_page_text(HISTORY_URL)
         ytcfg = find_ytcfg(content)
         headers = ytcfg_headers(ytcfg)
         headers['x-spf-previous'] = HISTORY_URL
@@ -149,18 +256,9 @@ class YouTube(DownloadMixin):
         params = {'name': 'feedbackEndpoint'}
         try:
             data = {
-                'sej':
-                json.dumps(
-                    init_data['contents']['twoColumnBrowseResultsRenderer']
-                    ['secondaryContents']['browseFeedActionsRenderer']
-                    ['contents'][2]['buttonRenderer']['navigationEndpoint']
-                    ['confirmDialogEndpoint']['content']
-                    ['confirmDialogRenderer']['confirmButton']
-                    ['buttonRenderer']['serviceEndpoint']),
-                'csn':
-                ytcfg['EVENT_ID'],
-                'session_token':
-                ytcfg['XSRF_TOKEN']
+                'sej': json_dumps(at_path(_CLEAR_HISTORY_SEJ_PATH, init_data)),
+                'csn': ytcfg['EVENT_ID'],
+                'session_token': ytcfg['XSRF_TOKEN']
             }
         except KeyError:
             self._log.debug('Clear button is likely disabled. History is '
@@ -174,77 +272,73 @@ class YouTube(DownloadMixin):
                             method='post')
         self._log.info('Successfully cleared history')
 
-    def get_playlist_info(self, playlist_id: str) -> Iterator[PlaylistInfo]:
-        """Get playlist information given a playlist ID."""
+    def get_playlist_info(self,
+                          playlist_id: str,
+                          prefetch: bool = False) -> Iterator[PlaylistInfo]:
+        """
+        Get playlist information given a playlist ID.
+
+        With `prefetch`, the next page is downloaded while the current one is
+        being consumed.
+        """
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
         url = 'https://www.youtube.com/playlist?list={}'.format(playlist_id)
-        content = self._download_page_soup(url)
+        content = self._download_page_text(url)
         ytcfg = find_ytcfg(content)
         headers = ytcfg_headers(ytcfg)
         yt_init_data = initial_data(content)
         video_list_renderer: Optional[PlaylistVideoListRenderer] = None
         try:
-            video_list_renderer = (
-                yt_init_data['contents']['twoColumnBrowseResultsRenderer']
-                ['tabs'][0]['tabRenderer']['content']['sectionListRenderer']
-                ['contents'][0]['itemSectionRenderer']['contents'][0]
-                ['playlistVideoListRenderer'])
+            video_list_renderer = at_path(_PLAYLIST_VIDEO_LIST_PATH,
+                                          yt_init_data)
         except KeyError as e:
             if e.args[0] == 'playlistVideoListRenderer':
                 raise KeyError('This playlist might be empty.') from e
             raise e
         assert video_list_renderer is not None
-        try:
-            for item in video_list_renderer['contents']:
-                if 'playlistVideoRenderer' in item:
-                    yield item
-                elif 'continuationItemRenderer' in item:
-                    break
-        except KeyError:
-            yield from []
-        endpoint = continuation = itct = None
-        try:
-            endpoint = (video_list_renderer['contents'][-1]
-                        ['continuationItemRenderer']['continuationEndpoint'])
-            continuation = endpoint['continuationCommand']['token']
-            itct = endpoint['clickTrackingParams']
-        except KeyError:
-            pass
-        if continuation and itct:
-            while True:
-                params = {
-                    'ctoken': continuation,
-                    'continuation': continuation,
-                    'itct': itct
-                }
-                contents = cast(
-                    BrowseAJAXSequence,
-                    self._download_page(BROWSE_AJAX_URL,
-                                        params=params,
-                                        return_json=True,
-                                        headers=headers))
-                response = contents[1]['response']
-                items = (
-                    response['onResponseReceivedActions'][0]
-                    ['appendContinuationItemsAction']['continuationItems'])
-                for item in items:
-                    if 'playlistVideoRenderer' in item:
-                        yield item
-                    elif 'continuationItemRenderer' in item:
-                        try:
-                            endpoint = (video_list_renderer['contents'][-1]
-                                        ['continuationItemRenderer']
-                                        ['continuationEndpoint'])
-                            continuation = endpoint['continuationCommand'][
-                                'token']
-                            itct = endpoint['clickTrackingParams']
-                        except KeyError:
-                            pass
-                        break
-                if 'continuationItemRenderer' not in items[-1]:
-                    break
+        first_items = video_list_renderer.get('contents') or []
+        for item in first_items:
+            if 'playlistVideoRenderer' in item:
+                yield item
+            elif 'continuationItemRenderer' in item:
+                break
+        if (not first_items
+                or 'continuationItemRenderer' not in first_items[-1]):
+            return
+
+        def next_params(item: Mapping[str, Any]) -> Dict[str, str]:
+            endpoint = item['continuationItemRenderer']['continuationEndpoint']
+            cont_val = endpoint['continuationCommand']['token']
+            return dict(ctoken=cont_val,
+                        continuation=cont_val,
+                        itct=endpoint['clickTrackingParams'])
+
+        def fetch(params: Dict[str, str]) -> BrowseAJAXSequence:
+            return cast(
+                BrowseAJAXSequence,
+                self._download_page(BROWSE_AJAX_URL,
+                                    params=params,
+                                    return_json=True,
+                                    headers=headers))
+
+        def parse(
+            contents: BrowseAJAXSequence
+        ) -> Tuple[Sequence[PlaylistInfo], Optional[Dict[str, str]]]:
+            items = at_path(_CONTINUATION_ITEMS_PATH, contents[1]['response'])
+            if not items:
+                # Videos removed while listing can leave nothing on this page
+                return [], None
+            last_item = items[-1]
+            if 'continuationItemRenderer' in last_item:
+                return items[:-1], next_params(last_item)
+            return items, None
+
+        for item in paginate(fetch, parse, next_params(first_items[-1]),
+                             prefetch):
+            if 'playlistVideoRenderer' in item:
+                yield item
 
     def clear_playlist(self, playlist_id: str) -> None:
         """
@@ -254,183 +348,223 @@ class YouTube(DownloadMixin):
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        playlist_info = self.get_playlist_info(playlist_id)
+        ytcfg = self._playlist_edit_ytcfg()
+        # Removing videos while paging can shift the pages that follow, so
+        # repeat until a pass finds nothing left to remove. Stop early if a
+        # pass sees the same videos as the one before, as they cannot be
+        # removed.
+        previous: AbstractSet[str] = frozenset()
+        for _ in range(CLEAR_PLAYLIST_MAX_PASSES):
+            seen = self._clear_playlist_pass(playlist_id, ytcfg)
+            if seen is None:
+                self._log.warning('Failed to remove videos from playlist %s',
+                                  playlist_id)
+                return
+            if not seen:
+                return
+            if seen == previous:
+                break
+            previous = seen
+        self._log.warning('Videos left in playlist %s: %s', playlist_id,
+                          ', '.join(sorted(previous)))
+
+    def _clear_playlist_pass(self, playlist_id: str,
+                             ytcfg: YtcfgDict) -> Optional[AbstractSet[str]]:
+        """
+        Removes the videos of a playlist while it is being listed. Batches are
+        removed in worker threads while the next pages are downloaded.
+
+        Returns the set of video IDs found, or `None` if a removal failed.
+        """
+        def remove(video_ids: Sequence[str]) -> bool:
+            self._log.debug('Deleting %d videos from playlist', len(video_ids))
+            return self._edit_playlist(playlist_id,
+                                       _remove_video_actions(video_ids), ytcfg)
+
+        futures = []
+        seen: Set[str] = set()
+        batch: List[str] = []
+        playlist = self.get_playlist_info(playlist_id, prefetch=True)
         try:
-            video_ids = list(
-                map(lambda x: x['playlistVideoRenderer']['videoId'],
-                    playlist_info))
+            first_item = next(playlist)
+        except StopIteration:
+            return seen
         except KeyError:
-            self._log.info('Caught KeyError. This probably means the playlist '
-                           'is empty.')
-            return
-        for video_id in video_ids:
-            self._log.debug('Deleting from playlist: video_id = %s', video_id)
-            self.remove_video_id_from_playlist(playlist_id, video_id)
+            self._log.info('Caught KeyError. This probably means the '
+                           'playlist is empty.')
+            return seen
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for item in chain((first_item, ), playlist):
+                video_id = item['playlistVideoRenderer']['videoId']
+                seen.add(video_id)
+                batch.append(video_id)
+                if len(batch) == PLAYLIST_EDIT_BATCH_SIZE:
+                    futures.append(executor.submit(remove, batch))
+                    batch = []
+            if batch:
+                futures.append(executor.submit(remove, batch))
+            if not all([f.result() for f in futures]):
+                return None
+        return seen
 
     def clear_watch_later(self) -> None:
         """Removes all videos from the 'Watch Later' playlist."""
         self.clear_playlist('WL')
 
-    def get_history_info(self) -> Iterator[Mapping[str, Any]]:
-        """Get information about the History playlist."""
+    def get_history_info(
+            self,
+            prefetch: bool = False) -> Iterator[Mapping[str, Any]]:
+        """
+        Get information about the History playlist.
+
+        With `prefetch`, the next page is downloaded while the current one is
+        being consumed.
+        """
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        content = self._download_page_soup(HISTORY_URL)
+        content = self._download_page_text(HISTORY_URL)
         init_data = initial_data(content)
         ytcfg = find_ytcfg(content)
         headers = ytcfg_headers(ytcfg)
-        section_list_renderer = (
-            init_data['contents']['twoColumnBrowseResultsRenderer']['tabs'][0]
-            ['tabRenderer']['content']['sectionListRenderer'])
+        self._last_history_ytcfg = ytcfg
+        self._last_history_headers = headers
+        section_list_renderer = at_path(_FIRST_TAB_SECTION_LIST_PATH,
+                                        init_data)
         next_continuation = None
         for section_list in section_list_renderer['contents']:
-            try:
+            if 'itemSectionRenderer' in section_list:
                 yield from section_list['itemSectionRenderer']['contents']
-            except KeyError:
-                if 'continuationItemRenderer' in section_list:
-                    next_continuation = dict(
-                        continuation=(section_list['continuationItemRenderer']
-                                      ['continuationEndpoint']
-                                      ['continuationCommand']['token']),
-                        clickTrackingParams=(
-                            section_list['continuationItemRenderer']
-                            ['continuationEndpoint']['clickTrackingParams']))
-                    break
+            elif 'continuationItemRenderer' in section_list:
+                endpoint = (section_list['continuationItemRenderer']
+                            ['continuationEndpoint'])
+                next_continuation = dict(
+                    continuation=endpoint['continuationCommand']['token'],
+                    clickTrackingParams=endpoint['clickTrackingParams'])
+                break
         if not next_continuation:
-            try:
-                next_continuation = (section_list_renderer['continuations'][0]
-                                     ['nextContinuationData'])
-            except KeyError as e:
+            if 'continuations' not in section_list_renderer:
                 return
-        assert next_continuation is not None
-        params = dict(continuation=next_continuation['continuation'],
-                      ctoken=next_continuation['continuation'],
+            next_continuation = (section_list_renderer['continuations'][0]
+                                 ['nextContinuationData'])
+        cont_val = next_continuation['continuation']
+        params = dict(continuation=cont_val,
+                      ctoken=cont_val,
                       itct=next_continuation['clickTrackingParams'])
-        xsrf = ytcfg['XSRF_TOKEN']
-        resp = None
-        while True:
-            tries = 0
-            time = 0
-            last_exception = None
-            while tries < 5:
-                if time:
-                    sleep(time)
-                try:
-                    resp = cast(
-                        BrowseAJAXSequence,
-                        self._download_page(BROWSE_AJAX_URL,
-                                            return_json=True,
-                                            headers=headers,
-                                            data={'session_token': xsrf},
-                                            method='post',
-                                            params=params))
-                    break
-                except HTTPError as e:
-                    last_exception = e
-                    tries += 1
-                    time = 2**tries
-            if last_exception:
-                self._log.debug('Caught HTTP error: %s, text: %s',
-                                last_exception, last_exception.response.text)
-                break
-            assert resp is not None
+
+        def fetch(
+                state: Tuple[Dict[str, str],
+                             str]) -> Optional[BrowseAJAXSequence]:
+            params, xsrf = state
+            # Retries with backoff are done by the session's HTTPAdapter
+            try:
+                return cast(
+                    BrowseAJAXSequence,
+                    self._download_page(BROWSE_AJAX_URL,
+                                        return_json=True,
+                                        headers=headers,
+                                        data={'session_token': xsrf},
+                                        method='post',
+                                        params=params))
+            except HTTPError as e:
+                self._log.debug('Caught HTTP error: %s, text: %s', e,
+                                e.response.text)
+                return None
+
+        def parse(
+            resp: BrowseAJAXSequence
+        ) -> Tuple[Sequence[Mapping[str, Any]], Optional[Tuple[Dict[str, str],
+                                                                str]]]:
             contents = resp[1]['response']
             try:
-                section_list_renderer = (
-                    contents['onResponseReceivedActions'][0]
-                    ['appendContinuationItemsAction']['continuationItems'])
+                section_list_renderer = at_path(_CONTINUATION_ITEMS_PATH,
+                                                contents)
             except KeyError as e:
                 self._log.debug('Caught KeyError: %s. Possible keys: %s', e,
                                 ', '.join(contents.keys()))
-                break
-            continuations = None
+                return [], None
+            items: List[Mapping[str, Any]] = []
+            next_cont = None
             for section_list in section_list_renderer:
-                try:
-                    yield from section_list['itemSectionRenderer']['contents']
-                except KeyError as e:
-                    if 'continuationItemRenderer' in section_list:
-                        continuations = [
-                            dict(nextContinuationData=dict(
-                                continuation=(
-                                    section_list['continuationItemRenderer']
-                                    ['continuationEndpoint']
-                                    ['continuationCommand']['token']),
-                                clickTrackingParams=(
-                                    section_list['continuationItemRenderer']
-                                    ['continuationEndpoint']
-                                    ['clickTrackingParams'])))
-                        ]
-                        break
-                    raise e
-            if not continuations:
-                try:
-                    continuations = section_list_renderer['continuations']
-                except KeyError as e:
-                    # Probably the end of the history
-                    self._log.debug('Caught KeyError: %s. Possible keys: %s',
-                                    e, ', '.join(section_list_renderer.keys()))
-                    break
-                except TypeError as e:
-                    # Probably the end of the history
-                    self._log.debug(
-                        'Caught TypeError evaluating '
-                        '"section_list_renderer[\'continuations\']": %s', e)
+                if 'continuationItemRenderer' in section_list:
+                    endpoint = (section_list['continuationItemRenderer']
+                                ['continuationEndpoint'])
+                    next_cont = dict(
+                        continuation=endpoint['continuationCommand']['token'],
+                        clickTrackingParams=endpoint['clickTrackingParams'])
                     break
-            xsrf = resp[1]['xsrf_token']
-            assert continuations is not None
-            next_cont = continuations[0]['nextContinuationData']
-            params['itct'] = next_cont['clickTrackingParams']
-            params['ctoken'] = next_cont['continuation']
-            params['continuation'] = next_cont['continuation']
+                items.extend(section_list['itemSectionRenderer']['contents'])
+            if not next_cont:
+                # Probably the end of the history
+                return items, None
+            cont_val = next_cont['continuation']
+            return items, (dict(itct=next_cont['clickTrackingParams'],
+                                ctoken=cont_val,
+                                continuation=cont_val), resp[1]['xsrf_token'])
+
+        yield from paginate(fetch, parse, (params, ytcfg['XSRF_TOKEN']),
+                            prefetch)
 
     def remove_video_ids_from_history(self, video_ids: Sequence[str]) -> bool:
-        """Delete a history entry by video ID."""
+        """Delete all history entries matching the given video IDs."""
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
         if not video_ids:
             return False
-        history_info = self.get_history_info()
-        content = self._download_page_soup(HISTORY_URL)
-        ytcfg = find_ytcfg(content)
-        headers = ytcfg_headers(ytcfg)
+        if isinstance(video_ids, str):
+            video_ids = [video_ids]
+        wanted = set(video_ids)
         entries = [
-            x for x in history_info
-            if x['videoRenderer']['videoId'] in video_ids
+            x for x in self.get_history_info()
+            if x['videoRenderer']['videoId'] in wanted
         ]
         if not entries:
             return False
-        codes = []
-        for entry in entries:
+        # Set when get_history_info() fetched the history page
+        ytcfg = self._last_history_ytcfg
+        headers = self._last_history_headers
+        assert ytcfg is not None and headers is not None
+
+        def post(entry: Mapping[str, Any]) -> bool:
             resp = cast(
                 HasStringCode,
                 self._download_page(
                     SERVICE_AJAX_URL,
                     return_json=True,
                     data=dict(
-                        sej=json.dumps(entry['videoRenderer']['menu']
-                                       ['menuRenderer']['topLevelButtons'][0]
-                                       ['buttonRenderer']['serviceEndpoint']),
+                        sej=json_dumps(at_path(_HISTORY_ENTRY_SEJ_PATH,
+                                               entry)),
                         csn=ytcfg['EVENT_ID'],
                         session_token=ytcfg['XSRF_TOKEN']),
                     method='post',
                     headers=headers,
                     params=dict(name='feedbackEndpoint')))
-            codes.append(resp['code'] == 'SUCCESS')
-        return all(codes)
+            return resp['code'] == 'SUCCESS'
+
+        if len(entries) == 1:
+            return post(entries[0])
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return all(list(executor.map(post, entries)))
 
     def _authorization_sapisidhash_header(self) -> str:
-        now = int(datetime.now().timestamp())
-        sapisid: Optional[str] = None
-        for cookie in self._cj:
-            if cookie.name in ('SAPISID', '__Secure-3PAPISID'):
-                sapisid = cookie.value
-                break
-        assert sapisid is not None
-        m = hashlib.sha1()
-        m.update(f'{now} {sapisid} https://www.youtube.com'.encode())
-        return f'SAPISIDHASH {now}_{m.hexdigest()}'
+        now = int(_now())
+        # Read and written as one tuple as worker threads share this cache
+        last_ts, last_header = self._sapisidhash
+        if now == last_ts:
+            return last_header
+        if not self._sapisid:
+            self._sapisid = self._find_sapisid()
+        assert self._sapisid is not None
+        try:
+            # The hash is a request fingerprint, not a security measure
+            m = hashlib.sha1(usedforsecurity=False)
+        except TypeError:  # Python < 3.9
+            m = hashlib.sha1()
+        m.update(f'{now} {self._sapisid} https://www.youtube.com'.encode())
+        header = f'SAPISIDHASH {now}_{m.hexdigest()}'
+        self._sapisidhash = (now, header)
+        return header
 
     def _single_feedback_api_call(
             self,
@@ -456,7 +590,7 @@ class YouTube(DownloadMixin):
                     client=context_client_body(ytcfg),
                     request=dict(consistencyTokenJars=[],
                                  internalExperimentFlags=[]),
-                    user=dict(lockedSafetyMode=False))),
+                    user=dict(lockedSafetyMode=False)),
                           feedbackTokens=[feedback_token],
                           isFeedbackTokenUnencrypted=False,
                           shouldMerge=False),
@@ -466,13 +600,11 @@ class YouTube(DownloadMixin):
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        content = self._download_page_soup(page_url)
+        content = self._download_page_text(page_url)
         ytcfg = find_ytcfg(content)
-        info = at_path(('contents.twoColumnBrowseResultsRenderer.'
-                        'secondaryContents.browseFeedActionsRenderer.contents.'
-                        f'{contents_index}.buttonRenderer.navigationEndpoint.'
-                        'confirmDialogEndpoint.content.confirmDialogRenderer.'
-                        'confirmEndpoint'), initial_data(content))
+        info = at_path(
+            _FEED_ACTIONS_PATH + (contents_index, ) + _CONFIRM_ENDPOINT_PATH,
+            initial_data(content))
         return self._single_feedback_api_call(
             ytcfg, info['feedbackEndpoint']['feedbackToken'],
             info['clickTrackingParams'],
@@ -488,61 +620,68 @@ class YouTube(DownloadMixin):
 
     def _community_history(
             self,
-            only_first_page: bool = False) -> Iterator[CommunityHistoryEntry]:
+            only_first_page: bool = False,
+            prefetch: bool = False) -> Iterator['CommunityHistoryEntry']:
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        content = self._download_page_soup(COMMUNITY_HISTORY_URL)
+        # pylint: disable=import-outside-toplevel
+        from .community import make_community_history_entry
+        content = self._download_page_text(COMMUNITY_HISTORY_URL)
         ytcfg = find_ytcfg(content)
         headers = ytcfg_headers(ytcfg)
         headers['x-spf-previous'] = COMMUNITY_HISTORY_URL
         headers['x-spf-referer'] = COMMUNITY_HISTORY_URL
-        item_section = at_path(
-            ('contents.twoColumnBrowseResultsRenderer.tabs.'
-             '0.tabRenderer.content.sectionListRenderer.contents.0.'
-             'itemSectionRenderer'), initial_data(content))
+        item_section = at_path(_COMMUNITY_ITEM_SECTION_PATH,
+                               initial_data(content))
         info = item_section['contents']
-        delete_action_path = (
-            'actionMenu.menuRenderer.items.0.menuNavigationItemRenderer.'
-            'navigationEndpoint.confirmDialogEndpoint.content.'
-            'confirmDialogRenderer.confirmButton.buttonRenderer.'
-            'serviceEndpoint.performCommentActionEndpoint.action')
         for api_entry in (x['commentHistoryEntryRenderer'] for x in info):
-            yield make_community_history_entry(api_entry, delete_action_path)
+            yield make_community_history_entry(api_entry,
+                                               _COMMUNITY_DELETE_ACTION_PATH)
         if (only_first_page or 'continuations' not in item_section
                 or not item_section['continuations']):
             return
-        has_continuations = True
-        while has_continuations:
-            for cont in item_section['continuations']:
-                data = cast(
-                    Sequence[Any],
-                    self._download_page(
-                        BROWSE_AJAX_URL,
-                        method='post',
-                        params=dict(
-                            ctoken=(
-                                cont['nextContinuationData']['continuation']),
-                            continuation=(
-                                cont['nextContinuationData']['continuation']),
-                            itct=(cont['nextContinuationData']
-                                  ['clickTrackingParams'])),
-                        data=dict(session_token=ytcfg['XSRF_TOKEN']),
-                        headers=headers,
-                        return_json=True))
-                item_section = (data[1]['response']['continuationContents']
-                                ['itemSectionContinuation'])
-                for api_entry in (x['commentHistoryEntryRenderer']
-                                  for x in item_section['contents']):
-                    yield make_community_history_entry(api_entry,
-                                                       delete_action_path)
-                has_continuations = ('continuations' in item_section
-                                     and item_section['continuations'])
+
+        def fetch(next_cont: Mapping[str, str]) -> Sequence[Any]:
+            cont_val = next_cont['continuation']
+            return cast(
+                Sequence[Any],
+                self._download_page(
+                    BROWSE_AJAX_URL,
+                    method='post',
+                    params=dict(ctoken=cont_val,
+                                continuation=cont_val,
+                                itct=next_cont['clickTrackingParams']),
+                    data=dict(session_token=ytcfg['XSRF_TOKEN']),
+                    headers=headers,
+                    return_json=True))
+
+        def parse(
+            data: Sequence[Any]
+        ) -> Tuple[Sequence['CommunityHistoryEntry'], Optional[Mapping[
+                str, str]]]:
+            item_section = (data[1]['response']['continuationContents']
+                            ['itemSectionContinuation'])
+            entries = [
+                make_community_history_entry(x['commentHistoryEntryRenderer'],
+                                             _COMMUNITY_DELETE_ACTION_PATH)
+                for x in item_section['contents']
+            ]
+            if not item_section.get('continuations'):
+                return entries, None
+            return entries, (item_section['continuations'][0]
+                             ['nextContinuationData'])
+
+        yield from paginate(
+            fetch, parse,
+            item_section['continuations'][0]['nextContinuationData'],
+            prefetch)
 
     def community_history(
             self,
-            only_first_page: bool = False) -> Iterator[CommunityHistoryEntry]:
-        yield from self._community_history(only_first_page)
+            only_first_page: bool = False,
+            prefetch: bool = False) -> Iterator['CommunityHistoryEntry']:
+        yield from self._community_history(only_first_page, prefetch)
 
     def delete_community_entry(
             self,
@@ -553,8 +692,8 @@ class YouTube(DownloadMixin):
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
         if not ytcfg:
-            content = self._download_page_soup(COMMUNITY_HISTORY_URL)
-            ytcfg = find_ytcfg(content)
+            ytcfg = find_ytcfg(
+                self._download_page_text(COMMUNITY_HISTORY_URL))
         return (at_path(
             'actionResults.0.status',
             cast(
@@ -587,13 +726,7 @@ class YouTube(DownloadMixin):
         if not self.logged_in:
             raise AuthenticationError('This method requires a call to '
                                       'login() first')
-        content = self._download_page_soup(SEARCH_HISTORY_URL)
+        content = self._download_page_text(SEARCH_HISTORY_URL)
         return self._single_feedback_api_call(
             find_ytcfg(content),
-            at_path(
-                'contents.twoColumnBrowseResultsRenderer.'
-                'secondaryContents.browseFeedActionsRenderer.'
-                'contents.1.buttonRenderer.navigationEndpoint.'
-                'confirmDialogEndpoint.content.confirmDialogRenderer.'
-                'confirmEndpoint.feedbackEndpoint.feedbackToken',
-                initial_data(content)))
+            at_path(_CLEAR_SEARCH_HISTORY_TOKEN_PATH, initial_data(content)))
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional, Sequence
+from typing import Any, Mapping, Optional, Sequence, Union
 
-from .util import path_default, try_get
+from .util import PathKeys, path_default, try_get
 
 __all__ = ('CommunityHistoryEntry', 'DEFAULT_DELETE_ACTION_PATH',
            'make_community_history_entry')
@@ -22,7 +22,7 @@ class CommunityHistoryEntry:
 
 def make_community_history_entry(
     api_entry: Mapping[str, Any],
-    delete_action_path: str = DEFAULT_DELETE_ACTION_PATH
+    delete_action_path: Union[str, PathKeys] = DEFAULT_DELETE_ACTION_PATH
 ) -> CommunityHistoryEntry:
     return CommunityHistoryEntry(
         content=try_get(api_entry, lambda x: x['content']['runs']),
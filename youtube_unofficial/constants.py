@@ -2,9 +2,10 @@ from typing import Mapping, Set, Tuple
 
 from typing_extensions import Final
 
-__all__ = ('BROWSE_AJAX_URL', 'CHALLENGE_URL', 'EXTRACTED_THUMBNAIL_KEYS',
-           'HISTORY_ENTRY_KEYS_TO_SKIP', 'HISTORY_URL', 'LOGIN_URL',
-           'LOOKUP_URL', 'NETRC_MACHINE', 'SERVICE_AJAX_URL',
+__all__ = ('BROWSE_AJAX_URL', 'CHALLENGE_URL', 'CLEAR_PLAYLIST_MAX_PASSES',
+           'EXTRACTED_THUMBNAIL_KEYS', 'HISTORY_ENTRY_KEYS_TO_SKIP',
+           'HISTORY_URL', 'LOGIN_URL', 'LOOKUP_URL', 'MAX_WORKERS',
+           'NETRC_MACHINE', 'PLAYLIST_EDIT_BATCH_SIZE', 'SERVICE_AJAX_URL',
            'SIMPLE_TEXT_KEYS', 'TEXT_RUNS_KEYS', 'TFA_URL', 'THUMBNAILS_KEYS',
            'USER_AGENT', 'WATCH_HISTORY_URL', 'WATCH_LATER_URL')
 
@@ -26,6 +27,13 @@ TFA_URL: Final[
     str] = 'https://accounts.google.com/_/signin/challenge?hl=en&TL={0}'
 WATCH_HISTORY_URL: Final[str] = 'https://www.youtube.com/feed/history'
 WATCH_LATER_URL: Final[str] = 'https://www.youtube.com/playlist?list=WL'
+# Maximum number of actions sent in a single edit_playlist request
+PLAYLIST_EDIT_BATCH_SIZE: Final[int] = 50
+# Number of concurrent requests made when deleting many items. Must not exceed
+# the session's connection pool size.
+MAX_WORKERS: Final[int] = 8
+# Upper bound on listing passes made by clear_playlist()
+CLEAR_PLAYLIST_MAX_PASSES: Final[int] = 10
 # print-history-ids constants
 EXTRACTED_THUMBNAIL_KEYS: Final[Tuple[str, str,
                                       str]] = ('width', 'height', 'url')
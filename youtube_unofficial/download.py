@@ -1,10 +1,25 @@
-from typing import Any, Mapping, Optional, Sequence, Union, cast
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import (Any, Callable, Iterable, Iterator, Mapping, MutableMapping,
+                    Optional, Sequence, Tuple, TypeVar, Union, cast)
 
-from bs4 import BeautifulSoup as Soup
 from requests import Request, Session
 from typing_extensions import Literal
 
-__all__ = ('DownloadMixin', 'download_page')
+from .util import json_loads
+
+__all__ = ('DownloadMixin', 'ETagCache', 'download_page', 'paginate')
+
+R = TypeVar('R')
+S = TypeVar('S')
+T = TypeVar('T')
+
+# Maps a URL to its ETag, body and encoding
+ETagCache = MutableMapping[str, Tuple[str, bytes, Optional[str]]]
+
+# Guards the session headers, which are updated by every call to
+# download_page() and may be used from several threads
+_headers_lock = Lock()
 
 
 def download_page(
@@ -15,21 +30,69 @@ def download_page(
         headers: Optional[Mapping[str, str]] = None,
         params: Optional[Mapping[str, str]] = None,
         return_json: bool = False,
-        json: Any = None) -> Union[str, Sequence[Any], Mapping[str, Any]]:
-    if headers:
-        sess.headers.update(headers)
+        json: Any = None,
+        return_bytes: bool = False,
+        etag_cache: Optional[ETagCache] = None
+) -> Union[str, bytes, Sequence[Any], Mapping[str, Any]]:
     req = Request(method.upper(), url, data=data, params=params, json=json)
-    prepped = sess.prepare_request(req)  # type: ignore[no-untyped-call]
-    del prepped.headers['accept-encoding']
+    with _headers_lock:
+        if headers:
+            sess.headers.update(headers)
+        prepped = sess.prepare_request(req)  # type: ignore[no-untyped-call]
+    if method != 'get':
+        etag_cache = None
+    prepped_url = cast(str, prepped.url)
+    cached = etag_cache.get(prepped_url) if etag_cache is not None else None
+    if cached:
+        prepped.headers['If-None-Match'] = cached[0]
     r = sess.send(prepped)  # type: ignore[no-untyped-call]
     r.raise_for_status()
+    if cached and r.status_code == 304:
+        r._content = cached[1]  # pylint: disable=protected-access
+        r.encoding = cached[2]
+    elif etag_cache is not None and r.headers.get('ETag'):
+        etag_cache[prepped_url] = (r.headers['ETag'], r.content, r.encoding)
+    if return_bytes:
+        return cast(bytes, r.content)
     if not return_json:
         return r.text.strip()
-    return cast(Mapping[str, Any], r.json())
+    return cast(Mapping[str, Any], json_loads(r.content))
+
+
+def paginate(fetch: Callable[[S], Optional[R]],
+             parse: Callable[[R], Tuple[Iterable[T], Optional[S]]],
+             state: S,
+             prefetch: bool = False) -> Iterator[T]:
+    """
+    Yields items from continuation pages.
+
+    `fetch` downloads the page for a continuation state (returning `None`
+    stops), and `parse` returns a page's items and the state for the next
+    page (or `None` on the last page). With `prefetch`, the next page is
+    downloaded in a background thread while the current page's items are
+    being consumed.
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    future: Optional['Future[Optional[R]]'] = None
+    try:
+        next_state: Optional[S] = state
+        while next_state is not None:
+            resp = future.result() if future else fetch(next_state)
+            if resp is None:
+                break
+            items, next_state = parse(resp)
+            future = (executor.submit(fetch, next_state)
+                      if executor and next_state is not None else None)
+            yield from items
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
 
 
 class DownloadMixin:  # pylint: disable=too-few-public-methods
+    __slots__ = ()
     _sess: Session
+    _etag_cache: ETagCache
 
     def _download_page(
             self,
@@ -39,10 +102,22 @@ class DownloadMixin:  # pylint: disable=too-few-public-methods
             headers: Optional[Mapping[str, str]] = None,
             params: Optional[Mapping[str, str]] = None,
             return_json: bool = False,
-            json: Any = None) -> Union[str, Sequence[Any], Mapping[str, Any]]:
+            json: Any = None,
+            return_bytes: bool = False
+    ) -> Union[str, bytes, Sequence[Any], Mapping[str, Any]]:
         return download_page(self._sess, url, data, method, headers, params,
-                             return_json, json)
+                             return_json, json, return_bytes)
 
-    def _download_page_soup(self, *args: Any, **kwargs: Any) -> Soup:
-        return Soup(cast(str, self._download_page(*args, **kwargs)),
-                    kwargs.pop('parser', 'html5lib'))
+    def _download_page_text(self, url: str, **kwargs: Any) -> bytes:
+        """
+        Returns the raw response body without decoding or parsing it. Only
+        these page fetches use the ETag cache; API responses such as
+        continuation pages are never requested twice.
+        """
+        return cast(
+            bytes,
+            download_page(self._sess,
+                          url,
+                          return_bytes=True,
+                          etag_cache=self._etag_cache,
+                          **kwargs))
@@ -1,21 +1,14 @@
 from typing import Any, Mapping, cast
-import json
 import re
 
-from bs4 import BeautifulSoup as Soup
+from .util import json_loads
 
-from .util import first
+YT_INITIAL_DATA_RE = re.compile(
+    rb'ytInitialData\s*=\s*(\{.*?\})\s*;\s*</script>', re.S)
 
-YT_INITIAL_DATA_RE = r'^var ytInitialData(?:\s+)?='
 
-
-def initial_data(content: Soup) -> Mapping[str, Any]:
-    return cast(
-        Mapping[str, Any],
-        json.loads(
-            first(
-                re.sub(
-                    YT_INITIAL_DATA_RE, '',
-                    first(x.text.strip() for x in content.select('script')
-                          if re.match(YT_INITIAL_DATA_RE,
-                                      x.text.strip()))).split('\n'))[:-1]))
+def initial_data(content: bytes) -> Mapping[str, Any]:
+    m = YT_INITIAL_DATA_RE.search(content)
+    if not m:
+        raise IndexError(0)
+    return cast(Mapping[str, Any], json_loads(m.group(1)))
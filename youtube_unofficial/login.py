@@ -12,7 +12,7 @@ import requests
 
 from .constants import (CHALLENGE_URL, LOGIN_URL, LOOKUP_URL, NETRC_MACHINE,
                         TFA_URL)
-from .download import DownloadMixin
+from .download import DownloadMixin, ETagCache
 from .exceptions import AuthenticationError, TwoFactorError
 from .util import html_hidden_inputs, remove_start, try_get
 from .ytcfg import find_ytcfg
@@ -39,6 +39,7 @@ class YouTubeLogin(DownloadMixin):
         self.password = password
         self._cj = cookies
         self._sess = session
+        self._etag_cache: ETagCache = {}
         self._log: Final[logging.Logger] = logging.getLogger(
             'youtube-unofficial')
         self.logged_in = bool(logged_in)
@@ -56,7 +57,7 @@ class YouTubeLogin(DownloadMixin):
             self._log.debug('Using default two-factor callback')
             tfa_code_callback = _stdin_tfa_code_callback
         # Check if already logged in with cookies
-        content = self._download_page_soup('https://www.youtube.com/')
+        content = self._download_page_text('https://www.youtube.com/')
         ytcfg = find_ytcfg(content)
         if ytcfg['LOGGED_IN']:
             self._log.debug('Already logged in via cookies')
@@ -1,6 +1,8 @@
+from functools import lru_cache
 from html.parser import HTMLParser
 from typing import (Any, Callable, Dict, Iterable, Mapping, Optional, Sequence,
-                    Type, TypeVar, Union)
+                    Tuple, Type, TypeVar, Union, cast)
+import json
 import random
 import re
 
@@ -8,13 +10,33 @@ from .constants import USER_AGENT
 from .typing.history import DescriptionSnippetDict
 from .typing.ytcfg import CountryLocationInfoDict, YtcfgDict
 
-__all__ = ('context_client_body', 'extract_attributes', 'extract_keys',
-           'get_text_runs', 'html_hidden_inputs', 'path', 'path_default',
-           'remove_start', 'try_get')
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+__all__ = ('PathKeys', 'compile_path', 'context_client_body',
+           'extract_attributes', 'extract_keys', 'get_text_runs',
+           'html_hidden_inputs', 'json_dumps', 'json_loads', 'path',
+           'path_default', 'remove_start', 'try_get')
 
 T = TypeVar('T')
 
 
+def json_loads(s: Union[str, bytes]) -> Any:
+    """Decode JSON using orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def json_dumps(obj: Any) -> str:
+    """Encode JSON using orjson if it is installed."""
+    if orjson is not None:
+        return cast(bytes, orjson.dumps(obj)).decode()
+    return json.dumps(obj)
+
+
 class HTMLAttributeParser(HTMLParser):  # pylint: disable=abstract-method
     """Trivial HTML parser to gather the attributes for a single element"""
     def __init__(self) -> None:
@@ -91,20 +113,24 @@ def extract_keys(keys: Sequence[Any], obj: Mapping[Any,
     return new
 
 
-def path(s: str, obj: Any) -> Any:
-    for prop in s.split('.'):
-        if isinstance(obj, list):
-            try:
-                int_prop = int(prop)
-            except TypeError:
-                raise TypeError('Property for a list must be an integer')
-            obj = obj[int_prop]
-        else:
-            obj = obj[prop]
+PathKeys = Tuple[Union[str, int], ...]
+
+
+@lru_cache(maxsize=None)
+def compile_path(s: str) -> PathKeys:
+    """Split a dotted path into keys."""
+    return tuple(s.split('.'))
+
+
+def path(s: Union[str, PathKeys], obj: Any) -> Any:
+    for key in (compile_path(s) if isinstance(s, str) else s):
+        obj = obj[int(key)] if isinstance(obj, list) else obj[key]
     return obj
 
 
-def path_default(s: str, obj: Any, default: Any = None) -> Any:
+def path_default(s: Union[str, PathKeys],
+                 obj: Any,
+                 default: Any = None) -> Any:
     try:
         return path(s, obj)
     except (IndexError, KeyError):
@@ -116,15 +142,30 @@ def get_text_runs(desc: DescriptionSnippetDict) -> str:
                    for x in desc['runs']).strip().replace('\n', ' - ')
 
 
-def context_client_body(
-    ytcfg: YtcfgDict
-) -> Mapping[str, Union[str, int, float, CountryLocationInfoDict]]:
+ContextClientBody = Mapping[str, Union[str, int, float,
+                                      CountryLocationInfoDict]]
+
+
+def context_client_body(ytcfg: YtcfgDict) -> ContextClientBody:
+    """
+    Build the client part of an InnerTube request context. The result is
+    cached for the values read from `ytcfg` and must not be modified.
+    """
+    return _context_client_body(ytcfg['INNERTUBE_CONTEXT_CLIENT_VERSION'],
+                                ytcfg['INNERTUBE_CONTEXT_GL'],
+                                ytcfg['INNERTUBE_CONTEXT_HL'],
+                                ytcfg['VISITOR_DATA'])
+
+
+@lru_cache(maxsize=16)
+def _context_client_body(client_version: str, gl: str, hl: str,
+                         visitor_data: str) -> ContextClientBody:
     return {
         'browserName': 'Chrome',
         'browserVersion': '88.0.4324.96',
         'clientFormatFactor': 'UNKNOWN_FORM_FACTOR',
         'clientName': 'WEB',
-        'clientVersion': ytcfg['INNERTUBE_CONTEXT_CLIENT_VERSION'],
+        'clientVersion': client_version,
         'connectionType': 'CONN_WIFI',
         'countryLocationInfo': {
             'countryCode': 'US',
@@ -133,8 +174,8 @@ def context_client_body(
         'deviceMake': '',
         'deviceModel': '',
         'geo': 'US',
-        'gl': ytcfg['INNERTUBE_CONTEXT_GL'],
-        'hl': ytcfg['INNERTUBE_CONTEXT_HL'],
+        'gl': gl,
+        'hl': hl,
         'osName': 'X11',
         'platform': 'DESKTOP',
         'screenDensityFloat': random.choice((1, 1.5, 2, 3)),
@@ -145,7 +186,7 @@ def context_client_body(
         'userAgent': USER_AGENT,
         'userInterfaceTheme': 'USER_INTERFACE_THEME_DARK',
         'utcOffsetMinutes': -300,
-        'visitorData': ytcfg['VISITOR_DATA'],
+        'visitorData': visitor_data,
     }
 
 
@@ -1,25 +1,38 @@
-from typing import Dict, cast
+from typing import Any, Dict, Mapping, Optional, cast
 import json
 import re
 
-from bs4 import BeautifulSoup as Soup
-
 from .constants import WATCH_LATER_URL
 from .typing.ytcfg import YtcfgDict
-from .util import first
+from .util import json_loads
 
 __all__ = ('find_ytcfg', 'ytcfg_headers')
 
+YTCFG_SET_RE = re.compile(rb'ytcfg\.set\(\s*\{')
+YTCFG_OBJECT_RE = re.compile(rb'(\{.*?\})\s*\)\s*;', re.S)
+
+
+def _decode_object(content: bytes, start: int) -> Optional[Mapping[str, Any]]:
+    m = YTCFG_OBJECT_RE.match(content, start)
+    if m:
+        try:
+            return cast(Mapping[str, Any], json_loads(m.group(1)))
+        except ValueError:
+            # The non-greedy match stopped at a '});' inside a string
+            pass
+    try:
+        return cast(Mapping[str, Any],
+                    json.JSONDecoder().raw_decode(content[start:].decode())[0])
+    except ValueError:
+        return None
+
 
-def find_ytcfg(soup: Soup) -> YtcfgDict:
-    return cast(
-        YtcfgDict,
-        first(json.JSONDecoder().raw_decode(
-            re.sub(
-                r'.+ytcfg.set\(\{', '{',
-                first(x for x in soup.select('script')
-                      if '"INNERTUBE_CONTEXT_CLIENT_VERSION":' in
-                      x.text).text.strip().replace('\n', ''), 1))))
+def find_ytcfg(content: bytes) -> YtcfgDict:
+    for m in YTCFG_SET_RE.finditer(content):
+        ytcfg = _decode_object(content, m.end() - 1)
+        if ytcfg and 'INNERTUBE_CONTEXT_CLIENT_VERSION' in ytcfg:
+            return cast(YtcfgDict, ytcfg)
+    raise IndexError(0)
 
 
 def ytcfg_headers(ytcfg: YtcfgDict) -> Dict[str, str]: